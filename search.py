@@ -0,0 +1,152 @@
+import heapq
+import re
+from collections import defaultdict
+
+NAME_WEIGHT = 2
+DESC_WEIGHT = 1
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def short_prefix(token):
+    return token[:2]
+
+
+def ticket_number(card_name):
+    ticket = card_name.split(':')[0].strip()
+    return ticket if ticket.isdigit() else None
+
+
+def create_index():
+    return {
+        'cards': {},
+        'order': {},
+        'card_tokens': {},
+        'postings': defaultdict(dict),
+        'trigrams': defaultdict(set),
+        'prefixes': defaultdict(set),
+        'tickets': defaultdict(set)
+    }
+
+
+def add_card(index, card):
+    remove_card(index, card['id'])
+
+    weights = {}
+    for token in tokenize(card.get('desc')):
+        weights[token] = DESC_WEIGHT
+    for token in tokenize(card['name']):
+        weights[token] = NAME_WEIGHT
+
+    for token, weight in weights.items():
+        if token not in index['postings']:
+            for trigram in trigrams(token):
+                index['trigrams'][trigram].add(token)
+            index['prefixes'][short_prefix(token)].add(token)
+        index['postings'][token][card['id']] = weight
+
+    index['cards'][card['id']] = card
+    index['order'].setdefault(card['id'], len(index['order']))
+    index['card_tokens'][card['id']] = set(weights)
+
+    ticket = ticket_number(card['name'])
+    if ticket:
+        index['tickets'][ticket].add(card['id'])
+
+
+def remove_card(index, card_id):
+    card = index['cards'].pop(card_id, None)
+    if card is None:
+        return
+    index['order'].pop(card_id, None)
+
+    for token in index['card_tokens'].pop(card_id):
+        postings = index['postings'][token]
+        postings.pop(card_id, None)
+        if not postings:
+            del index['postings'][token]
+            for trigram in trigrams(token):
+                index['trigrams'][trigram].discard(token)
+                if not index['trigrams'][trigram]:
+                    del index['trigrams'][trigram]
+            prefix = short_prefix(token)
+            index['prefixes'][prefix].discard(token)
+            if not index['prefixes'][prefix]:
+                del index['prefixes'][prefix]
+
+    ticket = ticket_number(card['name'])
+    if ticket:
+        index['tickets'][ticket].discard(card_id)
+        if not index['tickets'][ticket]:
+            del index['tickets'][ticket]
+
+
+def update_index(index, cards):
+    order = {}
+    for card in cards:
+        order[card['id']] = len(order)
+        cached = index['cards'].get(card['id'])
+        if cached is None or cached['name'] != card['name'] or cached.get('desc') != card.get('desc'):
+            add_card(index, card)
+        else:
+            index['cards'][card['id']] = card
+
+    for card_id in [card_id for card_id in index['cards'] if card_id not in order]:
+        remove_card(index, card_id)
+
+    index['order'] = order
+    return index
+
+
+def matching_tokens(index, fragment):
+    # Fragments too short to have a trigram only match the start of a word, and a single
+    # character only matches a whole word, since it would otherwise hit nearly every card.
+    if len(fragment) == 1:
+        return [fragment] if fragment in index['postings'] else []
+    if len(fragment) == 2:
+        return index['prefixes'].get(fragment, set())
+
+    candidates = None
+    for trigram in trigrams(fragment):
+        tokens = index['trigrams'].get(trigram, set())
+        candidates = tokens if candidates is None else candidates & tokens
+        if not candidates:
+            return []
+    return [token for token in candidates if fragment in token]
+
+
+def search(index, query, limit=20):
+    scores = None
+    for fragment in tokenize(query):
+        fragment_scores = {}
+        for token in matching_tokens(index, fragment):
+            for card_id, weight in index['postings'][token].items():
+                fragment_scores[card_id] = max(fragment_scores.get(card_id, 0), weight)
+
+        if scores is None:
+            scores = fragment_scores
+        else:
+            scores = {card_id: score + fragment_scores[card_id] for card_id, score in scores.items() if card_id in fragment_scores}
+        if not scores:
+            return []
+
+    if scores is None:
+        card_ids = heapq.nsmallest(limit, index['cards'], key=lambda card_id: index['order'][card_id])
+    else:
+        card_ids = heapq.nsmallest(limit, scores, key=lambda card_id: (-scores[card_id], index['order'][card_id]))
+    return [index['cards'][card_id] for card_id in card_ids]
+
+
+def find_by_ticket(index, ticket):
+    card_ids = index['tickets'].get(ticket.lstrip('#').strip())
+    if not card_ids:
+        return None
+    # Several cards can share a ticket number; the first one on the board wins.
+    return index['cards'][min(card_ids, key=lambda card_id: index['order'][card_id])]
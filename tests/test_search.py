@@ -0,0 +1,100 @@
+import search
+
+
+def make_index(cards):
+    return search.update_index(search.create_index(), cards)
+
+
+def names(cards):
+    return [card['name'] for card in cards]
+
+
+CARDS = [
+    {'id': 'c1', 'name': '1: Fix login redirect', 'desc': 'Users land on a blank page'},
+    {'id': 'c2', 'name': '2: Write docs', 'desc': 'Explain the login flow'},
+    {'id': 'c3', 'name': '3: Add search', 'desc': ''},
+    {'id': 'c4', 'name': '12: Cache board', 'desc': 'Keep the board in memory'}
+]
+
+
+def test_empty_query_lists_cards_in_board_order():
+    index = make_index(CARDS)
+    assert names(search.search(index, '')) == names(CARDS)
+    assert names(search.search(index, '', limit=2)) == ['1: Fix login redirect', '2: Write docs']
+
+
+def test_name_matches_rank_above_description_matches():
+    index = make_index(CARDS)
+    assert names(search.search(index, 'login')) == ['1: Fix login redirect', '2: Write docs']
+
+
+def test_substring_and_multi_word_queries():
+    index = make_index(CARDS)
+    assert names(search.search(index, 'earc')) == ['3: Add search']
+    assert names(search.search(index, 'log redir')) == ['1: Fix login redirect']
+    assert search.search(index, 'login cache') == []
+
+
+def test_short_fragments():
+    index = make_index(CARDS)
+    assert names(search.search(index, 'bo')) == ['12: Cache board']
+    assert names(search.search(index, '3')) == ['3: Add search']
+    assert search.search(index, 'g') == []
+
+
+def test_edited_card_is_reindexed():
+    index = make_index(CARDS)
+    edited = [dict(card) for card in CARDS]
+    edited[2]['name'] = '3: Add fuzzy finder'
+    search.update_index(index, edited)
+
+    assert search.search(index, 'search') == []
+    assert names(search.search(index, 'fuzzy')) == ['3: Add fuzzy finder']
+
+
+def test_removed_card_is_dropped():
+    index = make_index(CARDS)
+    search.update_index(index, CARDS[1:])
+
+    assert names(search.search(index, 'login')) == ['2: Write docs']
+    assert search.find_by_ticket(index, '#1') is None
+    assert 'redirect' not in index['postings']
+    assert 'red' not in index['trigrams']
+
+
+def test_remove_card():
+    index = make_index(CARDS)
+    search.remove_card(index, 'c4')
+
+    assert search.search(index, 'board') == []
+    assert names(search.search(index, '')) == names(CARDS[:3])
+
+
+def test_find_by_ticket():
+    index = make_index(CARDS)
+    assert search.find_by_ticket(index, '#12')['id'] == 'c4'
+    assert search.find_by_ticket(index, '12')['id'] == 'c4'
+    assert search.find_by_ticket(index, '#99') is None
+
+
+def test_shared_ticket_number_survives_removal():
+    index = make_index([
+        {'id': 'a', 'name': '5: First copy', 'desc': ''},
+        {'id': 'b', 'name': '5: Second copy', 'desc': ''}
+    ])
+    assert search.find_by_ticket(index, '#5')['id'] == 'a'
+
+    search.update_index(index, [{'id': 'a', 'name': '5: First copy', 'desc': ''}])
+    assert search.find_by_ticket(index, '#5')['id'] == 'a'
+
+    search.update_index(index, [{'id': 'b', 'name': '5: Second copy', 'desc': ''}])
+    assert search.find_by_ticket(index, '#5')['id'] == 'b'
+
+    search.update_index(index, [])
+    assert search.find_by_ticket(index, '#5') is None
+    assert index['tickets'] == {}
+
+
+def test_ticket_number_is_searchable():
+    index = make_index(CARDS)
+    assert names(search.search(index, '12')) == ['12: Cache board']
@@ -0,0 +1,114 @@
+import math
+import random
+
+import pytest
+import requests
+
+import trello
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def fake_list_endpoint(cards, calls, honour_range=True):
+    def get(url, params=None):
+        calls.append(params)
+        matching = [
+            card for card in cards
+            if not honour_range
+            or ((params.get('since') is None or card['id'] > params['since'])
+                and (params.get('before') is None or card['id'] < params['before']))
+        ]
+        # Like Trello, return the cards in board position order rather than by id.
+        matching.sort(key=lambda card: card['pos'])
+        fields = params['fields'].split(',')
+        return FakeResponse([{field: card[field] for field in fields if field in card} for card in matching[:params['limit']]])
+    return get
+
+
+def make_cards(positions):
+    return [{'id': f'{i:024x}', 'name': f'{i}: card', 'pos': position} for i, position in enumerate(positions)]
+
+
+@pytest.fixture
+def cards():
+    rng = random.Random(28)
+    return make_cards(rng.sample(range(100000), 2500))
+
+
+def test_get_cards_pages_through_whole_list(monkeypatch, cards):
+    calls = []
+    monkeypatch.setattr(requests, 'get', fake_list_endpoint(cards, calls))
+
+    fetched = list(trello.get_cards('list1', 'key', 'token', page_size=100))
+
+    assert sorted(card['id'] for card in fetched) == sorted(card['id'] for card in cards)
+    assert len(calls) > 1
+    assert all(params['fields'] in (trello.CARD_FIELDS, 'id') and params['limit'] == 100 for params in calls)
+
+
+@pytest.mark.parametrize('positions', [range(2500), range(2500, 0, -1)], ids=['oldest-first', 'newest-first'])
+def test_get_cards_pages_id_ordered_list_with_a_cursor(monkeypatch, positions):
+    cards = make_cards(positions)
+    calls = []
+    monkeypatch.setattr(requests, 'get', fake_list_endpoint(cards, calls))
+
+    fetched = list(trello.get_cards('list1', 'key', 'token', page_size=100))
+
+    assert len(fetched) == len(cards)
+    assert len({card['id'] for card in fetched}) == len(cards)
+    full_pages = [params for params in calls if params['fields'] == trello.CARD_FIELDS]
+    assert len(full_pages) == math.ceil(len(cards) / 100) + 1
+    assert len(calls) <= 2 * len(full_pages)
+
+
+def test_get_cards_finds_card_dragged_out_of_id_order(monkeypatch):
+    positions = list(range(2500))
+    positions[10] = 5000
+    cards = make_cards(positions)
+    calls = []
+    monkeypatch.setattr(requests, 'get', fake_list_endpoint(cards, calls))
+
+    fetched = list(trello.get_cards('list1', 'key', 'token', page_size=100))
+
+    assert sorted(card['id'] for card in fetched) == sorted(card['id'] for card in cards)
+
+
+def test_get_cards_stops_when_range_is_ignored(monkeypatch):
+    cards = make_cards(range(1500))
+    calls = []
+    monkeypatch.setattr(requests, 'get', fake_list_endpoint(cards, calls, honour_range=False))
+
+    fetched = list(trello.get_cards('list1', 'key', 'token'))
+
+    assert [card['id'] for card in fetched] == [card['id'] for card in cards[:1000]]
+    assert len(calls) < 10
+
+
+def test_get_cards_single_page(monkeypatch, cards):
+    calls = []
+    monkeypatch.setattr(requests, 'get', fake_list_endpoint(cards[:10], calls))
+
+    fetched = list(trello.get_cards('list1', 'key', 'token', fields='id,name,desc'))
+
+    assert len(fetched) == 10
+    assert len(calls) == 1
+    assert calls[0]['fields'] == 'id,name,desc'
+
+
+def test_get_cards_is_lazy(monkeypatch, cards):
+    calls = []
+    monkeypatch.setattr(requests, 'get', fake_list_endpoint(cards, calls))
+
+    first = next(trello.get_cards('list1', 'key', 'token', page_size=100))
+
+    assert first['id'] in {card['id'] for card in cards}
+    assert len(calls) == 1
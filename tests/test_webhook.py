@@ -0,0 +1,239 @@
+import base64
+import hashlib
+import hmac
+import http.client
+import os
+
+import pytest
+import requests
+
+import webhook
+
+CALLBACK_URL = 'https://tugs.example.com/'
+SECRET = 'app-secret'
+BOARD_ID = 'board1'
+PAYLOAD_DIR = os.path.join(os.path.dirname(__file__), 'payloads')
+
+
+class FakeResponse:
+    def __init__(self, data, status=200):
+        self.data = data
+        self.status = status
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise requests.HTTPError(f'{self.status} error')
+
+    def json(self):
+        return self.data
+
+
+class FakeTrello:
+    def __init__(self):
+        self.lists = [
+            {'id': 'list_todo', 'name': 'TODO'},
+            {'id': 'list_doing', 'name': 'Doing'},
+            {'id': 'list_done', 'name': 'DONE'}
+        ]
+        self.cards = {
+            'list_todo': [
+                {'id': 'card1', 'name': '1: Fix login', 'desc': 'Redirect loops', 'idList': 'list_todo', 'pos': 1},
+                {'id': 'card2', 'name': '2: Write docs', 'idList': 'list_todo', 'pos': 2}
+            ],
+            'list_doing': [],
+            'list_done': [
+                {'id': 'card0', 'name': '0: Set up board', 'idList': 'list_done', 'pos': 1}
+            ]
+        }
+        self.card_requests = {}
+        self.webhooks = []
+        self.deleted = []
+        self.fail_lists = False
+
+    def get(self, url, params=None):
+        if url.endswith(f"/tokens/{params['token']}/webhooks"):
+            return FakeResponse(self.webhooks)
+        if url.endswith(f'/boards/{BOARD_ID}/lists'):
+            return FakeResponse([], 500) if self.fail_lists else FakeResponse(self.lists)
+        list_id = url.split('/lists/')[1].split('/')[0]
+        self.card_requests[list_id] = params['fields']
+        return FakeResponse([dict(card) for card in self.cards[list_id]])
+
+    def post(self, url, params=None):
+        hook = {'id': 'hook1', 'callbackURL': params['callbackURL'], 'idModel': params['idModel'], 'active': True}
+        self.webhooks.append(hook)
+        return FakeResponse(hook)
+
+    def delete(self, url, params=None):
+        self.deleted.append(url.rsplit('/', 1)[1])
+        return FakeResponse({})
+
+
+@pytest.fixture
+def trello(monkeypatch):
+    fake = FakeTrello()
+    monkeypatch.setattr(requests, 'get', fake.get)
+    monkeypatch.setattr(requests, 'post', fake.post)
+    monkeypatch.setattr(requests, 'delete', fake.delete)
+    return fake
+
+
+@pytest.fixture
+def listener(trello):
+    server = webhook.start_webhook_listener(CALLBACK_URL, BOARD_ID, 'key', 'token', SECRET, port=0)
+    yield server
+    webhook.stop_webhook_listener(server, 'key', 'token')
+
+
+def load_payload(name):
+    with open(os.path.join(PAYLOAD_DIR, f'{name}.json'), 'rb') as file:
+        return file.read()
+
+
+def sign(body):
+    digest = hmac.new(SECRET.encode('utf-8'), body + CALLBACK_URL.encode('utf-8'), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def send(server, method, body=b'', signature=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+    headers = {'X-Trello-Webhook': sign(body) if signature is None else signature}
+    connection.request(method, '/', body=body, headers=headers)
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+
+def replay(server, name):
+    return send(server, 'POST', load_payload(name))
+
+
+def card_names(list_name):
+    return [card['name'] for card in webhook.get_cached_cards(list_name)]
+
+
+def test_head_probe_is_accepted(listener):
+    assert send(listener, 'HEAD') == 200
+
+
+def test_start_registers_webhook_and_loads_board(listener, trello):
+    assert listener.webhook_id == 'hook1'
+    assert card_names('TODO') == ['1: Fix login', '2: Write docs']
+    assert card_names('DOING') == []
+
+
+def test_create_card(listener):
+    assert replay(listener, 'create_card') == 200
+    assert card_names('TODO') == ['1: Fix login', '2: Write docs', '3: Add search']
+
+
+def test_move_card(listener):
+    replay(listener, 'move_card')
+    assert card_names('TODO') == ['2: Write docs']
+    assert card_names('DOING') == ['1: Fix login']
+
+
+def test_rename_card(listener):
+    replay(listener, 'rename_card')
+    assert card_names('TODO') == ['1: Fix login', '2: Update README']
+
+
+def test_archive_card(listener):
+    replay(listener, 'archive_card')
+    assert card_names('TODO') == ['1: Fix login']
+
+
+def test_delete_card(listener):
+    replay(listener, 'delete_card')
+    assert card_names('TODO') == ['2: Write docs']
+
+
+def test_rename_list(listener):
+    replay(listener, 'rename_list')
+    assert webhook.get_cached_cards('TODO') is None
+    assert card_names('Backlog') == ['1: Fix login', '2: Write docs']
+
+
+def test_rejects_bad_signature(listener):
+    assert send(listener, 'POST', load_payload('delete_card'), signature='forged') == 401
+    assert send(listener, 'POST', load_payload('delete_card'), signature='') == 401
+    assert card_names('TODO') == ['1: Fix login', '2: Write docs']
+
+
+def test_load_board_replays_pending_actions(listener):
+    webhook.board_loaded.clear()
+    replay(listener, 'create_card')
+    replay(listener, 'move_card')
+    assert webhook.get_cached_cards('TODO') is None
+    assert len(webhook.pending_actions) == 2
+
+    webhook.load_board(BOARD_ID, 'key', 'token')
+
+    assert webhook.pending_actions == []
+    assert card_names('TODO') == ['2: Write docs', '3: Add search']
+    assert card_names('DOING') == ['1: Fix login']
+
+
+def test_failed_load_marks_cache_stale(listener, trello):
+    trello.fail_lists = True
+    with pytest.raises(requests.HTTPError):
+        webhook.load_board(BOARD_ID, 'key', 'token')
+    assert webhook.get_cached_cards('TODO') is None
+
+
+def test_failed_start_stops_server_and_deletes_webhook(trello):
+    trello.fail_lists = True
+    with pytest.raises(requests.HTTPError):
+        webhook.start_webhook_listener(CALLBACK_URL, BOARD_ID, 'key', 'token', SECRET, port=0)
+
+    assert trello.deleted == ['hook1']
+    assert webhook.pending_actions == []
+    assert webhook.get_cached_cards('TODO') is None
+
+
+def test_stop_deletes_webhook(trello):
+    server = webhook.start_webhook_listener(CALLBACK_URL, BOARD_ID, 'key', 'token', SECRET, port=0)
+    webhook.stop_webhook_listener(server, 'key', 'token')
+
+    assert trello.deleted == ['hook1']
+    assert webhook.get_cached_cards('TODO') is None
+    with pytest.raises(OSError):
+        send(server, 'HEAD')
+
+
+def test_move_cached_card(listener):
+    webhook.move_cached_card('card2', 'list_doing')
+    assert card_names('TODO') == ['1: Fix login']
+    assert card_names('DOING') == ['2: Write docs']
+
+
+def test_snapshot_only_fetches_menu_lists(listener, trello):
+    assert trello.card_requests == {
+        'list_todo': 'id,name,idList,desc,pos',
+        'list_doing': 'id,name,idList,pos'
+    }
+    assert 'card0' not in webhook.board_cards
+
+
+def test_replayed_create_keeps_snapshot_fields(listener, trello):
+    trello.cards['list_todo'].insert(0, {'id': 'card3', 'name': '3: Add search', 'desc': 'Trigram index', 'idList': 'list_todo', 'pos': 0.5})
+    webhook.board_loaded.clear()
+    replay(listener, 'create_card')
+
+    webhook.load_board(BOARD_ID, 'key', 'token')
+
+    assert card_names('TODO') == ['3: Add search', '1: Fix login', '2: Write docs']
+    assert webhook.get_cached_cards('TODO')[0]['desc'] == 'Trigram index'
+
+
+def test_move_to_uncached_list_drops_card(listener):
+    webhook.move_cached_card('card1', 'list_done')
+    assert card_names('TODO') == ['2: Write docs']
+    assert 'card1' not in webhook.board_cards
+
+
+def test_list_renamed_to_menu_name_falls_back_to_polling(listener):
+    replay(listener, 'rename_list')
+    with webhook.board_lock:
+        webhook.apply_action({'type': 'updateList', 'data': {'list': {'id': 'list_done', 'name': 'TODO'}}})
+    assert webhook.get_cached_cards('TODO') is None
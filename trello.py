@@ -3,6 +3,8 @@ import secrets
 
 SECRETS_FILE = 'secrets.py'
 LIST_NAME = 'TODO'
+CARD_FIELDS = 'id,name,idList'
+CARD_PAGE_SIZE = 1000
 
 
 def get_lists(board_id, api_key, token):
@@ -16,15 +18,57 @@ def get_lists(board_id, api_key, token):
     return response.json()
 
 
-def get_cards(list_id, api_key, token):
+def get_card_page(url, params, since, before):
+    response = requests.get(url, params={**params, 'since': since, 'before': before})
+    response.raise_for_status()
+    cards = response.json()
+    # An endpoint that ignores since/before hands back cards outside the range; narrowing the
+    # range further would then return the same page forever.
+    honoured = all((since is None or card['id'] > since) and (before is None or card['id'] < before) for card in cards)
+    return cards, honoured
+
+
+def card_range_complete(url, params, since, before, seen):
+    cards, honoured = get_card_page(url, {**params, 'fields': 'id'}, since, before)
+    return honoured and len(cards) < params['limit'] and all(card['id'] in seen for card in cards)
+
+
+def get_cards(list_id, api_key, token, fields=CARD_FIELDS, page_size=CARD_PAGE_SIZE):
     url = f'https://api.trello.com/1/lists/{list_id}/cards'
     params = {
         'key': api_key,
-        'token': token
+        'token': token,
+        'fields': fields,
+        'limit': page_size
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    # Trello does not promise which cards of a since/before range (both exclusive) a full page
+    # holds. When a page comes back in id order it is taken to be the oldest (or newest) cards
+    # of the range, which is checked with an id-only request before the cursor moves past it.
+    # Any other full page is split at its median id into two narrower ranges. Cards are yielded
+    # as pages arrive, so request errors are raised while iterating, not on the call.
+    seen = set()
+    ranges = [(None, None)]
+    while ranges:
+        since, before = ranges.pop()
+        cards, honoured = get_card_page(url, params, since, before)
+
+        for card in cards:
+            if card['id'] not in seen:
+                seen.add(card['id'])
+                yield card
+
+        if len(cards) < page_size or not honoured:
+            continue
+
+        ids = [card['id'] for card in cards]
+        if ids == sorted(ids) and card_range_complete(url, params, since, ids[-1], seen):
+            ranges.append((ids[-1], before))
+        elif ids == sorted(ids, reverse=True) and card_range_complete(url, params, ids[-1], before, seen):
+            ranges.append((since, ids[-1]))
+        else:
+            pivot = sorted(ids)[len(ids) // 2]
+            ranges.append((pivot, before))
+            ranges.append((since, pivot))
 
 
 def fetch_doing_cards():
@@ -33,12 +77,12 @@ def fetch_doing_cards():
     token = secrets.TOKEN
 
     lists = get_lists(board_id, api_key, token)
-    doing_list = next((lst for lst in lists if lst['name'] == 'DOING'), None)
+    doing_list = next((lst for lst in lists if lst['name'].upper() == 'DOING'), None)
 
     if not doing_list:
-        raise ValueError(f"No list named '{LIST_NAME}' found on board.")
+        raise ValueError("No list named 'DOING' found on board.")
 
-    cards = get_cards(doing_list['id'], api_key, token)
+    cards = list(get_cards(doing_list['id'], api_key, token))
     return cards
 
 
@@ -48,12 +92,12 @@ def fetch_cards():
     token = secrets.TOKEN
 
     lists = get_lists(board_id, api_key, token)
-    todo_list = next((lst for lst in lists if lst['name'] == LIST_NAME), None)
+    todo_list = next((lst for lst in lists if lst['name'].upper() == LIST_NAME), None)
 
     if not todo_list:
         raise ValueError(f"No list named '{LIST_NAME}' found on board.")
 
-    cards = get_cards(todo_list['id'], api_key, token)
+    cards = list(get_cards(todo_list['id'], api_key, token, fields=f'{CARD_FIELDS},desc'))
     return cards
 
 
@@ -111,16 +155,3 @@ def get_done_list_id(board_id, api_key, token):
     if not done_list:
         raise ValueError("No list named 'DONE' found on board.")
     return done_list['id']
-
-
-def get_cards(list_id, api_key, token):
-    url = f"https://api.trello.com/1/lists/{list_id}/cards"
-    query = {
-        'key': api_key,
-        'token': token
-    }
-
-    response = requests.get(url, params=query)
-    response.raise_for_status()
-
-    return response.json()
\ No newline at end of file
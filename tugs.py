@@ -1,3 +1,4 @@
+import atexit
 import subprocess
 import random
 import string
@@ -5,17 +6,22 @@ import json
 import os
 import time
 import threading
+from itertools import chain
 import google.generativeai as genai
 
 from trello import LIST_NAME, fetch_cards, fetch_doing_cards, get_cards, get_doing_list_id, get_done_list_id, get_lists, move_card_to_list, create_card
+from search import create_index, find_by_ticket, remove_card, search, update_index
+from webhook import WEBHOOK_PORT, get_cached_cards, move_cached_card, start_webhook_listener, stop_webhook_listener
 
 CONFIG_FILE = 'git_helper_config.json'
 EMOJI_FILE = 'custom_emojis.json'
 WATCH_INTERVAL = 1  # in seconds
 UPSTREAM_CHECK_INTERVAL = 60  # in seconds
+CARD_PICKER_LIMIT = 20
 
 input_lock = threading.Lock()
 input_event = threading.Event()
+card_index = create_index()
 
 
 def load_json_file(filename):
@@ -291,7 +297,7 @@ def list_and_remove_branch():
 
 def list_doing_cards():
     try:
-        doing_cards = fetch_doing_cards()
+        doing_cards = fetch_board_cards('DOING', fetch_doing_cards)
 
         print("\n\033[1;34mDOING Cards:\033[0m")
         for idx, card in enumerate(doing_cards, start=1):
@@ -409,36 +415,49 @@ def exit_program():
 
 def select_trello_card_and_create_branch(project_name):
     try:
-        cards = fetch_cards()
-
-        print("\n\033[1;34mBacklog Cards:\033[0m")
-        for idx, card in enumerate(cards, start=1):
-            print(f"{idx}. {card['name']}")
+        update_index(card_index, fetch_board_cards(LIST_NAME, fetch_cards))
+
+        query = ''
+        while True:
+            cards = search(card_index, query, CARD_PICKER_LIMIT)
+
+            print(f"\n\033[1;34mBacklog Cards{f' matching {query!r}' if query else ''}:\033[0m")
+            for idx, card in enumerate(cards, start=1):
+                print(f"{idx}. {card['name']}")
+            if len(cards) == CARD_PICKER_LIMIT:
+                print(f"\033[1;33mShowing the first {CARD_PICKER_LIMIT} cards, type a search to narrow them down.\033[0m")
+
+            choice = safe_input(f"\033[1;34mChoose a card number, type to search or enter #<ticket> to jump to a ticket (or press enter to {'clear the search' if query else 'cancel'}):\033[0m ").strip()
+
+            if choice == '' and query:
+                query = ''
+            elif choice == '':
+                return
+            elif choice.startswith('#'):
+                card = find_by_ticket(card_index, choice)
+                if card:
+                    break
+                print(f"\033[1;31mNo card found for ticket {choice}.\033[0m")
+            elif choice.isdigit() and 1 <= int(choice) <= len(cards):
+                card = cards[int(choice) - 1]
+                break
+            else:
+                query = choice
 
-        choice = safe_input("\033[1;34mChoose a card number to create a feature branch (or press enter to cancel):\033[0m ").strip()
+        card_name = card['name']
+        card_id = card['id']
+        branch_name = create_branch_name(project_name, card_name)
+        create_git_branch(branch_name)
 
-        if choice.isdigit():
-            idx = int(choice) - 1
-            if 0 <= idx < len(cards):
-                card = cards[idx]
-                card_name = card['name']
-                card_id = card['id']
-                branch_name = create_branch_name(project_name, card_name)
-                create_git_branch(branch_name)
-
-                import secrets
-                board_id = secrets.BOARD_ID
-                api_key = secrets.API_KEY
-                token = secrets.TOKEN
-                doing_list_id = get_doing_list_id(board_id, api_key, token)
-                move_card_to_list(card_id, doing_list_id, api_key, token)
-                print(f"\033[1;32mMoved card '{card_name}' to the 'DOING' list.\033[0m")
-            else:
-                print("\033[1;31mInvalid card number.\033[0m")
-        elif choice == '':
-            return
-        else:
-            print("\033[1;31mInvalid input.\033[0m")
+        import secrets
+        board_id = secrets.BOARD_ID
+        api_key = secrets.API_KEY
+        token = secrets.TOKEN
+        doing_list_id = get_doing_list_id(board_id, api_key, token)
+        move_card_to_list(card_id, doing_list_id, api_key, token)
+        move_cached_card(card_id, doing_list_id)
+        remove_card(card_index, card_id)
+        print(f"\033[1;32mMoved card '{card_name}' to the 'DOING' list.\033[0m")
 
     except Exception as e:
         print(f"\033[1;31mAn error occurred: {e}\033[0m")
@@ -469,7 +488,7 @@ def create_trello_ticket():
         config = load_json_file(CONFIG_FILE)
 
         lists = get_lists(board_id, api_key, token)
-        todo_list = next((lst for lst in lists if lst['name'] == LIST_NAME), None)
+        todo_list = next((lst for lst in lists if lst['name'].upper() == LIST_NAME), None)
         doing_list = next((lst for lst in lists if lst['name'].upper() == 'DOING'), None)
         done_list = next((lst for lst in lists if lst['name'].upper() == 'DONE'), None)
 
@@ -477,11 +496,12 @@ def create_trello_ticket():
             print(f"\033[1;31mRequired lists not found on board.\033[0m")
             return
 
+        # get_cards() streams pages lazily, so request errors are raised by the loop below.
         todo_cards = get_cards(todo_list['id'], api_key, token)
         doing_cards = get_cards(doing_list['id'], api_key, token)
         done_cards = get_cards(done_list['id'], api_key, token)
 
-        all_cards = todo_cards + doing_cards + done_cards
+        all_cards = chain(todo_cards, doing_cards, done_cards)
         highest_ticket_nr = 0
 
         for card in all_cards:
@@ -548,12 +568,13 @@ def merge_branch_to_main(project_name):
         api_key = secrets.API_KEY
         token = secrets.TOKEN
 
-        cards = fetch_doing_cards()
+        cards = fetch_board_cards('DOING', fetch_doing_cards)
         card = next((card for card in cards if create_branch_name(project_name, card['name']) == current_branch), None)
 
         if card:
             done_list_id = get_done_list_id(board_id, api_key, token)
             move_card_to_list(card['id'], done_list_id, api_key, token)
+            move_cached_card(card['id'], done_list_id)
             print(f"\033[1;32mMoved card '{card['name']}' to the 'DONE' list.\033[0m")
         else:
             print("\033[1;31mNo matching card found for the current branch.\033[0m")
@@ -565,6 +586,33 @@ def merge_branch_to_main(project_name):
         print(f"\033[1;31mAn unexpected error occurred: {e}\033[0m")
 
 
+def fetch_board_cards(list_name, fetch):
+    cached = get_cached_cards(list_name)
+    if cached is not None:
+        return cached
+    return fetch()
+
+
+def start_board_cache():
+    import secrets
+    callback_url = getattr(secrets, 'WEBHOOK_CALLBACK_URL', None)
+    if not callback_url:
+        return
+
+    webhook_secret = getattr(secrets, 'WEBHOOK_SECRET', None)
+    if not webhook_secret:
+        print("\033[1;31mWEBHOOK_SECRET is not set, falling back to polling.\033[0m")
+        return
+
+    try:
+        port = getattr(secrets, 'WEBHOOK_PORT', WEBHOOK_PORT)
+        server = start_webhook_listener(callback_url, secrets.BOARD_ID, secrets.API_KEY, secrets.TOKEN, webhook_secret, port)
+        atexit.register(stop_webhook_listener, server, secrets.API_KEY, secrets.TOKEN)
+        print(f"\033[1;32mListening for Trello board updates on port {port}.\033[0m")
+    except Exception as e:
+        print(f"\033[1;31mCould not start the Trello webhook listener, falling back to polling: {e}\033[0m")
+
+
 def generate_commit_message(ticket_name):
     import secrets
     GEMINI_API_KEY = secrets.GEMINI_API_KEY
@@ -579,4 +627,5 @@ def generate_commit_message(ticket_name):
 if __name__ == "__main__":
     watcher_thread = threading.Thread(target=watch_directory, daemon=True)
     watcher_thread.start()
+    start_board_cache()
     main()
@@ -0,0 +1,259 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from trello import CARD_FIELDS, LIST_NAME, get_cards, get_lists
+
+WEBHOOK_HOST = '0.0.0.0'
+WEBHOOK_PORT = 8765
+BOARD_RESYNC_INTERVAL = 300  # in seconds
+# Only the lists the card menus read are cached; descriptions are only needed for the TODO search.
+CACHED_LIST_FIELDS = {
+    LIST_NAME: f'{CARD_FIELDS},desc,pos',
+    'DOING': f'{CARD_FIELDS},pos'
+}
+
+board_lock = threading.Lock()
+board_lists = {}
+board_cards = {}
+board_card_lists = set()
+pending_actions = []
+board_loaded = threading.Event()
+board_loading = threading.Event()
+
+
+def find_webhook(callback_url, board_id, api_key, token):
+    url = f'https://api.trello.com/1/tokens/{token}/webhooks'
+    params = {
+        'key': api_key,
+        'token': token
+    }
+    response = requests.get(url, params=params)
+    response.raise_for_status()
+    return next((hook for hook in response.json() if hook['callbackURL'] == callback_url and hook['idModel'] == board_id), None)
+
+
+def register_webhook(callback_url, board_id, api_key, token):
+    existing = find_webhook(callback_url, board_id, api_key, token)
+    if existing:
+        if not existing.get('active', True):
+            # Trello disables a webhook after repeated failed deliveries.
+            url = f"https://api.trello.com/1/webhooks/{existing['id']}"
+            params = {
+                'active': 'true',
+                'key': api_key,
+                'token': token
+            }
+            response = requests.put(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        return existing
+
+    url = 'https://api.trello.com/1/webhooks'
+    params = {
+        'callbackURL': callback_url,
+        'idModel': board_id,
+        'description': 'tugs board cache',
+        'key': api_key,
+        'token': token
+    }
+    response = requests.post(url, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def delete_webhook(webhook_id, api_key, token):
+    url = f'https://api.trello.com/1/webhooks/{webhook_id}'
+    params = {
+        'key': api_key,
+        'token': token
+    }
+    response = requests.delete(url, params=params)
+    response.raise_for_status()
+
+
+def load_board(board_id, api_key, token):
+    with board_lock:
+        board_loading.set()
+
+    try:
+        lists = {lst['id']: lst for lst in get_lists(board_id, api_key, token)}
+        card_lists = {list_id for list_id, lst in lists.items() if lst['name'].upper() in CACHED_LIST_FIELDS}
+        cards = {}
+        for list_id in card_lists:
+            for card in get_cards(list_id, api_key, token, fields=CACHED_LIST_FIELDS[lists[list_id]['name'].upper()]):
+                cards[card['id']] = card
+    except Exception:
+        with board_lock:
+            board_loading.clear()
+            board_loaded.clear()
+        raise
+
+    with board_lock:
+        board_lists.clear()
+        board_lists.update(lists)
+        board_cards.clear()
+        board_cards.update(cards)
+        board_card_lists.clear()
+        board_card_lists.update(card_lists)
+        # Actions that arrived while the snapshot was being fetched are replayed on top of it.
+        # apply_action() merges into existing entries, so an action the snapshot already
+        # reflects does not drop the fields the snapshot loaded.
+        for action in pending_actions:
+            apply_action(action)
+        pending_actions.clear()
+        board_loading.clear()
+        board_loaded.set()
+
+
+def apply_action(action):
+    action_type = action.get('type')
+    data = action.get('data', {})
+    card = data.get('card')
+    lst = data.get('list') or data.get('listAfter')
+
+    if action_type in ('createCard', 'copyCard', 'convertToCardFromCheckItem', 'moveCardToBoard', 'updateCard'):
+        if card.get('closed'):
+            board_cards.pop(card['id'], None)
+            return
+        cached = board_cards.setdefault(card['id'], {'id': card['id']})
+        cached.update(card)
+        if lst:
+            cached['idList'] = lst['id']
+        if cached.get('idList') not in board_card_lists:
+            board_cards.pop(card['id'])
+    elif action_type in ('deleteCard', 'moveCardFromBoard'):
+        board_cards.pop(card['id'], None)
+    elif action_type in ('createList', 'moveListToBoard'):
+        board_lists[lst['id']] = lst
+    elif action_type == 'updateList':
+        if lst.get('closed'):
+            board_lists.pop(lst['id'], None)
+            return
+        board_lists.setdefault(lst['id'], {'id': lst['id']}).update(lst)
+    elif action_type == 'moveListFromBoard':
+        board_lists.pop(lst['id'], None)
+
+
+def get_cached_cards(list_name):
+    if not board_loaded.is_set():
+        return None
+
+    with board_lock:
+        lst = next((lst for lst in board_lists.values() if lst['name'].upper() == list_name.upper()), None)
+        # A list renamed into a menu name after the last load has no cached cards yet.
+        if not lst or lst['id'] not in board_card_lists:
+            return None
+        cards = [dict(card) for card in board_cards.values() if card.get('idList') == lst['id']]
+
+    return sorted(cards, key=lambda card: card.get('pos', float('inf')))
+
+
+def move_cached_card(card_id, list_id):
+    # Mirrors a move tugs made itself, so menus are right before Trello's webhook delivery arrives.
+    with board_lock:
+        if card_id not in board_cards:
+            return
+        if list_id in board_card_lists:
+            board_cards[card_id]['idList'] = list_id
+        else:
+            del board_cards[card_id]
+
+
+def verify_signature(body, signature, callback_url, secret):
+    digest = hmac.new(secret.encode('utf-8'), body + callback_url.encode('utf-8'), hashlib.sha1).digest()
+    return hmac.compare_digest(base64.b64encode(digest).decode('ascii'), signature or '')
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        # Trello probes the callback URL with a HEAD request before it accepts the webhook.
+        self.send_response(200)
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if not verify_signature(body, self.headers.get('X-Trello-Webhook'), self.server.callback_url, self.server.secret):
+            self.send_response(401)
+            self.end_headers()
+            return
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        action = payload.get('action')
+        if action:
+            with board_lock:
+                if board_loaded.is_set():
+                    apply_action(action)
+                if board_loading.is_set() or not board_loaded.is_set():
+                    pending_actions.append(action)
+
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def resync_board(server, board_id, api_key, token, interval=BOARD_RESYNC_INTERVAL):
+    # Webhook deliveries can be missed, and Trello disables a hook that keeps failing, so the
+    # board is re-registered and reloaded periodically. Until a reload succeeds again the cache
+    # reports itself as not loaded and callers fall back to polling.
+    while not server.stopped.wait(interval):
+        try:
+            server.webhook_id = register_webhook(server.callback_url, board_id, api_key, token)['id']
+            load_board(board_id, api_key, token)
+        except Exception:
+            board_loaded.clear()
+
+
+def start_webhook_listener(callback_url, board_id, api_key, token, secret, port=WEBHOOK_PORT):
+    server = ThreadingHTTPServer((WEBHOOK_HOST, port), WebhookHandler)
+    server.callback_url = callback_url
+    server.secret = secret
+    server.webhook_id = None
+    server.stopped = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        server.webhook_id = register_webhook(callback_url, board_id, api_key, token)['id']
+        load_board(board_id, api_key, token)
+    except Exception as e:
+        try:
+            stop_webhook_listener(server, api_key, token)
+        except requests.RequestException:
+            pass
+        raise e
+
+    threading.Thread(target=resync_board, args=(server, board_id, api_key, token), daemon=True).start()
+    return server
+
+
+def stop_webhook_listener(server, api_key, token):
+    server.stopped.set()
+    server.shutdown()
+    server.server_close()
+
+    with board_lock:
+        board_loaded.clear()
+        board_loading.clear()
+        pending_actions.clear()
+        board_lists.clear()
+        board_cards.clear()
+        board_card_lists.clear()
+
+    if server.webhook_id:
+        delete_webhook(server.webhook_id, api_key, token)
+        server.webhook_id = None